@@ -0,0 +1,262 @@
+# SPDX-FileCopyrightText: © 2024 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.result import SimTimeoutError
+from cocotb.triggers import (
+    RisingEdge,
+    FallingEdge,
+    Edge,
+    ClockCycles,
+    Timer,
+    First,
+    ReadOnly,
+    with_timeout,
+)
+from cocotb.utils import get_sim_time
+
+# Set TB_SPI_BITBANG=1 to drive SPI frames from Python instead of the
+# tb_spi_master shim in tb.v (e.g. on simulators without the shim).
+SPI_BITBANG = bool(os.environ.get("TB_SPI_BITBANG"))
+
+# Set TB_HDL_CLK=1 when tb.v generates clk itself (the Makefile passes
+# +hdl_clk); setup_dut then leaves clk alone.
+HDL_CLK = bool(os.environ.get("TB_HDL_CLK"))
+
+# Set TB_HDL_SCLK=1 when tb.v generates SCLK while nCS is low (the Makefile
+# passes +hdl_sclk); SPI frames then only drive nCS and COPI from Python.
+HDL_SCLK = bool(os.environ.get("TB_HDL_SCLK"))
+
+# Set TB_BACKDOOR_CFG=1 to load the PWM enable registers directly instead of
+# writing them over SPI (RTL only; test_spi still covers the SPI path).
+BACKDOOR_CFG = bool(os.environ.get("TB_BACKDOOR_CFG"))
+
+
+# ----------------------------
+# Time helpers
+# ----------------------------
+def now_ns() -> float:
+    return float(get_sim_time(units="ns"))
+
+
+def freq_hz_from_period_ns(period_ns: float) -> float:
+    return 1.0 / (period_ns * 1e-9)
+
+
+# ----------------------------
+# SPI bit-bang helpers (Mode 0)
+# ----------------------------
+# ui_in mapping:
+#   ui_in[2] = nCS
+#   ui_in[1] = COPI
+#   ui_in[0] = SCLK
+# Only 8 pin combinations are ever driven, so precompute them as ints.
+_UI_IN_TBL = {
+    (ncs, bit, sclk): int(f"00000{ncs}{bit}{sclk}", 2)
+    for ncs in (0, 1)
+    for bit in (0, 1)
+    for sclk in (0, 1)
+}
+
+# (SCLK low, SCLK high) ui_in values for each COPI bit with nCS asserted
+_BIT_PHASES = tuple((_UI_IN_TBL[(0, bit, 0)], _UI_IN_TBL[(0, bit, 1)]) for bit in (0, 1))
+
+
+def frame_bits(frame):
+    """MSB-first bits of a 16-bit SPI frame."""
+    return tuple((frame >> (15 - i)) & 0x1 for i in range(16))
+
+
+async def bitbang_spi_frame(dut, frame):
+    """Drive one 16-bit frame on ui_in from Python, leaving nCS high."""
+    # Resolve the handle and build the half-period (5us of a 10us SCLK)
+    # trigger once; both are reused for all 32 SCLK phases.
+    ui_in = dut.ui_in
+    half_sclk = Timer(5, "us")
+
+    # Start transaction: nCS low
+    ui_in.value = _UI_IN_TBL[(0, 0, 0)]
+    await ClockCycles(dut.clk, 1)
+
+    # RW + address, then data (MSB first)
+    for bit in frame_bits(frame):
+        sclk_low, sclk_high = _BIT_PHASES[bit]
+
+        ui_in.value = sclk_low
+        await half_sclk
+
+        ui_in.value = sclk_high
+        await half_sclk
+
+    # End transaction: nCS high (commit happens on this edge in the DUT)
+    ui_in.value = _UI_IN_TBL[(1, 0, 0)]
+
+
+async def hdl_sclk_spi_frame(dut, frame):
+    """Drive one 16-bit frame against tb.v's SCLK oscillator, leaving nCS high."""
+    ui_in = dut.ui_in
+    sclk_falling = FallingEdge(dut.sclk_osc)
+    bits = frame_bits(frame)
+
+    # nCS low starts the oscillator; COPI holds the MSB for its first rising edge
+    ui_in.value = _UI_IN_TBL[(0, bits[0], 0)]
+
+    # Shift the next bit out after each falling edge (MSB first)
+    for bit in bits[1:]:
+        await sclk_falling
+        ui_in.value = _UI_IN_TBL[(0, bit, 0)]
+    await sclk_falling
+
+    # End transaction: nCS high (stops SCLK, commit happens on this edge in the DUT)
+    ui_in.value = _UI_IN_TBL[(1, 0, 0)]
+
+
+async def send_spi_transaction(dut, r_w, address, data, settle=True):
+    """
+    Send 16-bit SPI frame (mode 0), MSB-first:
+      [15]=R/W, [14:8]=addr, [7:0]=data
+
+    DUT samples COPI on SCLK rising edges while nCS is low.
+    With settle=False the write may not have reached the outputs on
+    return; only use it when another frame follows.
+    """
+    data_int = int(data)
+
+    if address < 0 or address > 127:
+        raise ValueError("Address must be 7-bit (0-127)")
+    if data_int < 0 or data_int > 255:
+        raise ValueError("Data must be 8-bit (0-255)")
+
+    first_byte = (int(r_w) << 7) | int(address)
+    frame = (first_byte << 8) | data_int
+
+    if HDL_SCLK:
+        await hdl_sclk_spi_frame(dut, frame)
+    elif SPI_BITBANG:
+        await bitbang_spi_frame(dut, frame)
+    else:
+        # tb_spi_master clocks the frame out and raises spi_done on nCS rise.
+        # A frame takes ~160us (16 x 10us SCLK); fail instead of hanging if
+        # the shim never finishes (e.g. spi_go not seen or clk stopped).
+        dut.spi_payload.value = frame
+        dut.spi_go.value = 1
+        await with_timeout(RisingEdge(dut.spi_done), 200, "us")
+        dut.spi_go.value = 0
+
+    if not settle:
+        # Hold nCS high just long enough for the DUT (and tb_spi_master's
+        # go edge detect) to see the end of the frame
+        await ClockCycles(dut.clk, 2)
+        return
+
+    # Give time for CDC + commit logic. nCS rise reaches the register write
+    # after the 2-FF synchroniser (2 clk) and out after the pwm_peripheral
+    # output register (1 clk); 30 clk (3us) leaves plenty of margin.
+    await Timer(3, "us")
+
+
+async def spi_write(dut, addr: int, data: int, settle=True):
+    """Write-only SPI transaction."""
+    await send_spi_transaction(dut, 1, addr, data, settle=settle)
+
+
+# ----------------------------
+# DUT setup
+# ----------------------------
+async def setup_dut(dut):
+    dut._log.info("Setup clock + reset")
+
+    # 10 MHz clock (100 ns period)
+    if not HDL_CLK:
+        clock = Clock(dut.clk, 100, units="ns")
+        cocotb.start_soon(clock.start())
+
+    # Idle pin values. Earlier tests in the same run leave these pins idle
+    # and they only feed clocked logic (plus the ui_in mux in tb.v), so an
+    # immediate write is safe; rst_n stays scheduled since it is an async reset.
+    dut.ena.setimmediatevalue(1)
+    dut.uio_in.setimmediatevalue(0)  # unused (all uio are outputs)
+    dut.spi_go.setimmediatevalue(0)
+    dut.spi_payload.setimmediatevalue(0)
+
+    # idle SPI pins: nCS=1, COPI=0, SCLK=0
+    dut.ui_in.setimmediatevalue(_UI_IN_TBL[(1, 0, 0)])
+
+    # reset
+    dut.rst_n.value = 0
+    await ClockCycles(dut.clk, 5)
+    dut.rst_n.value = 1
+    await ClockCycles(dut.clk, 10)
+
+
+# ----------------------------
+# PWM configuration
+# ----------------------------
+async def enable_pwm_on_uo0(dut):
+    """Enable uo_out[0] output + PWM mode on uo_out[0]."""
+    if BACKDOOR_CFG:
+        try:
+            regs = dut.user_project.spi_peripheral_ist
+        except AttributeError:
+            raise RuntimeError(
+                "TB_BACKDOOR_CFG needs the RTL hierarchy (user_project.spi_peripheral_ist); "
+                "unset it for gate level simulation"
+            ) from None
+        regs.en_reg_out_7_0.value = 0x01  # out enable bit0
+        regs.en_reg_pwm_7_0.value = 0x01  # pwm enable bit0
+        await ClockCycles(dut.clk, 1)
+        return
+
+    # Only the last frame needs to settle before the test reads outputs
+    await spi_write(dut, 0x00, 0x01, settle=False)  # out enable bit0
+    await spi_write(dut, 0x02, 0x01)  # pwm enable bit0
+
+
+# ----------------------------
+# Measurement helpers
+# ----------------------------
+async def measure_period_and_high_time(sig, timeout_us=5000):
+    """
+    Measure one PWM period using:
+      rising -> falling -> rising
+    Returns (period_ns, high_time_ns).
+    The whole measurement must finish within timeout_us.
+    """
+    async def three_edges():
+        await RisingEdge(sig)
+        t_rise1 = now_ns()
+
+        await FallingEdge(sig)
+        t_fall = now_ns()
+
+        await RisingEdge(sig)
+        t_rise2 = now_ns()
+
+        return (t_rise2 - t_rise1), (t_fall - t_rise1)
+
+    timeout = Timer(timeout_us, "us")
+    edges = cocotb.start_soon(three_edges())
+
+    result = await First(edges, timeout)
+    if result is timeout:
+        edges.kill()
+        raise SimTimeoutError(f"PWM edges not seen within {timeout_us}us")
+    return result
+
+
+async def assert_stays_constant(sig, expected: int, duration_us=2000):
+    """
+    Assert signal stays constant for a window (good for 0% and 100% duty).
+    Races any edge on sig against the window timeout instead of sampling.
+    """
+    window = Timer(duration_us, "us")
+    edge = Edge(sig)
+
+    await ReadOnly()
+    assert int(sig.value) == expected, f"Signal changed: expected {expected}, got {int(sig.value)}"
+
+    fired = await First(window, edge)
+    assert fired is window, f"Signal changed during window: now {int(sig.value)}"
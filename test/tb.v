@@ -6,10 +6,13 @@
 */
 module tb ();
 
-  // Dump the signals to a VCD file. You can view it with gtkwave or surfer.
+  // Dump the signals to a VCD file when run with +waves (TB_WAVES=1).
+  // You can view it with gtkwave or surfer.
   initial begin
-    $dumpfile("tb.vcd");
-    $dumpvars(0, tb);
+    if ($test$plusargs("waves")) begin
+      $dumpfile("tb.vcd");
+      $dumpvars(0, tb);
+    end
     #1;
   end
 
@@ -23,6 +26,62 @@ module tb ();
   wire [7:0] uio_out;
   wire [7:0] uio_oe;
 
+  // 10 MHz clock generated in HDL when run with +hdl_clk (TB_HDL_CLK=1),
+  // so cocotb doesn't have to toggle clk every 50 ns. Without the plusarg
+  // the cocotb Clock started in setup_dut drives clk.
+  initial begin
+    if ($test$plusargs("hdl_clk")) begin
+      clk = 1'b0;
+      forever #50 clk = ~clk;
+    end
+  end
+
+  // SPI master shim: while a frame is in flight it owns ui_in[2:0]
+  // (nCS, COPI, SCLK); otherwise the pins come straight from cocotb.
+  reg  [15:0] spi_payload;
+  reg         spi_go;
+  wire        spi_active;
+  wire        spi_ncs;
+  wire        spi_copi;
+  wire        spi_sclk;
+  wire        spi_done;
+
+  tb_spi_master spi_master (
+      .clk    (clk),
+      .rst_n  (rst_n),
+      .payload(spi_payload),
+      .go     (spi_go),
+      .active (spi_active),
+      .ncs    (spi_ncs),
+      .copi   (spi_copi),
+      .sclk   (spi_sclk),
+      .done   (spi_done)
+  );
+
+  // SCLK oscillator for +hdl_sclk (TB_HDL_SCLK=1): while cocotb holds nCS
+  // (ui_in[2]) low, sclk_osc runs at 100 kHz in place of ui_in[0] and
+  // cocotb only has to drive COPI.
+  reg       hdl_sclk;
+  reg [5:0] sclk_div;
+  reg       sclk_osc;
+
+  initial hdl_sclk = ($test$plusargs("hdl_sclk") != 0);
+
+  always @(posedge clk) begin
+    if (ui_in[2]) begin
+      sclk_div <= 6'd0;
+      sclk_osc <= 1'b0;
+    end else if (sclk_div == 6'd49) begin
+      sclk_div <= 6'd0;
+      sclk_osc <= ~sclk_osc;
+    end else begin
+      sclk_div <= sclk_div + 6'd1;
+    end
+  end
+
+  wire [7:0] dut_ui_in = spi_active ? {ui_in[7:3], spi_ncs, spi_copi, spi_sclk}
+                       : {ui_in[7:1], hdl_sclk ? sclk_osc : ui_in[0]};
+
 `ifdef GL_TEST
   wire VPWR = 1'b1;
   wire VGND = 1'b0;
@@ -36,7 +95,7 @@ module tb ();
       .VGND(VGND),
 `endif
 
-      .ui_in  (ui_in),    // Dedicated inputs
+      .ui_in  (dut_ui_in),  // Dedicated inputs
       .uo_out (uo_out),   // Dedicated outputs
       .uio_in (uio_in),   // IOs: Input path
       .uio_out(uio_out),  // IOs: Output path
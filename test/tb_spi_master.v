@@ -0,0 +1,109 @@
+`default_nettype none
+`timescale 1ns / 1ps
+
+/* Testbench-only SPI master (mode 0) so cocotb doesn't have to bit-bang SCLK.
+
+   A rising edge on go shifts payload out MSB-first with the same timing as
+   the Python bit-bang helper: one clk with nCS low, then HALF_SCLK clk
+   cycles per SCLK phase. done rises once nCS is released and stays high
+   until the next go. active is high while the frame is being driven.
+*/
+module tb_spi_master #(
+    parameter [15:0] HALF_SCLK = 16'd50  // 5us at the 10 MHz test clock
+) (
+    input  wire        clk,
+    input  wire        rst_n,
+    input  wire [15:0] payload,
+    input  wire        go,
+    output reg         active,
+    output reg         ncs,
+    output reg         copi,
+    output reg         sclk,
+    output reg         done
+);
+
+  localparam IDLE = 2'd0;
+  localparam LEAD = 2'd1;
+  localparam LOW  = 2'd2;
+  localparam HIGH = 2'd3;
+
+  localparam [15:0] LAST_TICK = HALF_SCLK - 16'd1;
+
+  reg [1:0]  state;
+  reg        go_q;
+  reg [15:0] shift;
+  reg [4:0]  bits_left;
+  reg [15:0] ticks;
+
+  always @(posedge clk or negedge rst_n) begin
+    if (!rst_n) begin
+      state     <= IDLE;
+      go_q      <= 1'b0;
+      shift     <= 16'b0;
+      bits_left <= 5'd0;
+      ticks     <= 16'd0;
+      active    <= 1'b0;
+      ncs       <= 1'b1;
+      copi      <= 1'b0;
+      sclk      <= 1'b0;
+      done      <= 1'b0;
+    end else begin
+      go_q <= go;
+
+      case (state)
+        IDLE: begin
+          if (go && !go_q) begin
+            // nCS low for one clk before the first bit
+            state     <= LEAD;
+            active    <= 1'b1;
+            done      <= 1'b0;
+            ncs       <= 1'b0;
+            copi      <= 1'b0;
+            sclk      <= 1'b0;
+            shift     <= payload;
+            bits_left <= 5'd16;
+          end
+        end
+
+        LEAD: begin
+          copi  <= shift[15];
+          shift <= {shift[14:0], 1'b0};
+          ticks <= LAST_TICK;
+          state <= LOW;
+        end
+
+        LOW: begin
+          if (ticks == 16'd0) begin
+            sclk  <= 1'b1;  // DUT samples COPI on this edge
+            ticks <= LAST_TICK;
+            state <= HIGH;
+          end else begin
+            ticks <= ticks - 16'd1;
+          end
+        end
+
+        HIGH: begin
+          if (ticks != 16'd0) begin
+            ticks <= ticks - 16'd1;
+          end else if (bits_left == 5'd1) begin
+            // End of frame: release nCS (DUT commits on this edge)
+            state  <= IDLE;
+            active <= 1'b0;
+            ncs    <= 1'b1;
+            copi   <= 1'b0;
+            sclk   <= 1'b0;
+            done   <= 1'b1;
+          end else begin
+            copi      <= shift[15];
+            shift     <= {shift[14:0], 1'b0};
+            sclk      <= 1'b0;
+            bits_left <= bits_left - 5'd1;
+            ticks     <= LAST_TICK;
+            state     <= LOW;
+          end
+        end
+      endcase
+    end
+  end
+
+endmodule
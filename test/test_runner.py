@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: © 2024 Tiny Tapeout
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Run each cocotb test in its own simulator process so pytest-xdist can
+spread them across cores:
+
+    pytest -n auto test_runner.py
+
+RTL simulation only; use the Makefile for gate level runs. WAVES=1 turns
+on cocotb's own waveform dump in each test's run directory.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+from filelock import FileLock
+from cocotb.runner import get_results, get_runner
+
+TEST_DIR = Path(__file__).resolve().parent
+SRC_DIR = TEST_DIR.parent / "src"
+PROJECT_SOURCES = ["project.v", "pwm_peripheral.v", "spi_peripheral.v"]
+
+COCOTB_TESTS = [
+    ("test", "test_spi"),
+    ("test", "test_pwm_freq"),
+    ("test", "test_pwm_duty"),
+    ("test_pwm", "test_pwm_0_percent"),
+    ("test_pwm", "test_pwm_100_percent"),
+    ("test_pwm", "test_pwm_50_percent_and_frequency"),
+]
+
+
+@pytest.fixture(scope="session")
+def sim_build():
+    """
+    Build the testbench once and share it between all tests. Each
+    pytest-xdist worker calls build(), but the lock makes them take turns
+    and build() skips work that is already up to date.
+    """
+    sim = os.environ.get("SIM", "icarus")
+    waves = os.environ.get("WAVES") == "1"
+    runner = get_runner(sim)
+
+    # Traced and untraced builds get their own directories
+    build_dir = TEST_DIR / "sim_build" / "runner" / (f"{sim}-waves" if waves else sim)
+    build_dir.mkdir(parents=True, exist_ok=True)
+
+    with FileLock(str(build_dir / "build.lock")):
+        runner.build(
+            verilog_sources=[SRC_DIR / src for src in PROJECT_SOURCES]
+            + [TEST_DIR / "tb_spi_master.v", TEST_DIR / "tb.v"],
+            includes=[SRC_DIR],
+            hdl_toplevel="tb",
+            build_dir=build_dir,
+            waves=waves,
+        )
+
+    return runner, build_dir, waves
+
+
+@pytest.mark.parametrize("test_module,testcase", COCOTB_TESTS)
+def test_cocotb(sim_build, test_module, testcase):
+    runner, build_dir, waves = sim_build
+
+    # Separate run directory per test so parallel workers don't collide
+    test_dir = build_dir / testcase
+    test_dir.mkdir(exist_ok=True)
+
+    plusargs = []
+    if os.environ.get("TB_HDL_CLK"):
+        plusargs.append("+hdl_clk")
+    if os.environ.get("TB_HDL_SCLK"):
+        plusargs.append("+hdl_sclk")
+
+    results_xml = runner.test(
+        test_module=test_module,
+        hdl_toplevel="tb",
+        testcase=testcase,
+        plusargs=plusargs,
+        build_dir=build_dir,
+        test_dir=test_dir,
+        results_xml=str(test_dir / "results.xml"),
+        waves=waves,
+    )
+
+    _num_tests, num_failed = get_results(results_xml)
+    assert num_failed == 0, f"{test_module}.{testcase} failed"